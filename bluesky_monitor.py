@@ -3,37 +3,111 @@ Bluesky Monitoring Module for Ansible Mentions
 Searches Bluesky for mentions of Ansible and related keywords using AT Protocol.
 """
 
-from atproto import Client
+from atproto import Client, SessionEvent
+from dateutil.parser import isoparse
 import os
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from textblob import TextBlob
+import functools
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Callable
 import logging
 import re
 
+from keyword_matcher import KeywordMatcher, get_keyword_matcher
+from models import Mention
+from sentiment import score_mentions
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Patterns used to clean post text before sentiment analysis
+_URL_RE = re.compile(r'http\S+|www\S+', re.MULTILINE)
+_MENTION_RE = re.compile(r'@[\w.-]+')
+_HASHTAG_RE = re.compile(r'#(\w+)')
+_WS_RE = re.compile(r'\s+')
+
+# Cached login sessions, reused across runs to avoid createSession rate limits
+DEFAULT_SESSION_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'mention_bot')
+
+
+def _parse_timestamp(value: str) -> Optional[float]:
+    """Convert an AT Protocol datetime string to epoch seconds (UTC if no offset)."""
+    if not value:
+        return None
+    try:
+        parsed = isoparse(value)
+    except ValueError:
+        logger.debug("Unparseable timestamp: %s", value)
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
 
 class BlueskyMonitor:
-    def __init__(self, username: str, password: str):
+    def __init__(self, username: str, password: str,
+                 session_dir: Optional[str] = DEFAULT_SESSION_DIR,
+                 include_raw: bool = False):
         """
         Initialize Bluesky API connection.
         
         Args:
             username: Bluesky username/handle
             password: Bluesky password or app password
+            session_dir: Where to cache the login session between runs
+                (None disables caching)
+            include_raw: Attach the raw engagement/author fields to each mention
         """
+        self.session_file = None
+        if session_dir:
+            # One file per account, so changing the username never resumes
+            # another account's session
+            account = re.sub(r'[^\w.@-]', '_', username.lower())
+            self.session_file = os.path.join(session_dir, f'bsky_session_{account}')
+        self.include_raw = include_raw
+        
         try:
             self.client = Client()
-            self.client.login(username, password)
+            self.client.on_session_change(self._on_session_change)
+            
+            if not self._login_with_cached_session():
+                self.client.login(username, password)
             logger.info("Bluesky API connection established")
         except Exception as e:
             logger.error(f"Failed to connect to Bluesky API: {e}")
             raise
 
+    def _login_with_cached_session(self) -> bool:
+        """Resume a cached session instead of calling createSession."""
+        if not self.session_file or not os.path.exists(self.session_file):
+            return False
+        
+        try:
+            with open(self.session_file, 'r', encoding='utf-8') as f:
+                session_string = f.read().strip()
+            self.client.login(session_string=session_string)
+            logger.info("Resumed cached Bluesky session")
+            return True
+        except Exception as e:
+            logger.warning(f"Cached Bluesky session rejected, logging in again: {e}")
+            return False
+
+    def _on_session_change(self, event: SessionEvent, session) -> None:
+        """Persist new and refreshed sessions so later runs can reuse them."""
+        if not self.session_file or event not in (SessionEvent.CREATE, SessionEvent.REFRESH):
+            return
+        
+        try:
+            os.makedirs(os.path.dirname(self.session_file), exist_ok=True)
+            fd = os.open(self.session_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                # The mode above only applies to new files; tighten existing ones too
+                os.chmod(self.session_file, 0o600)
+                f.write(session.export())
+        except OSError as e:
+            logger.warning(f"Failed to cache Bluesky session: {e}")
+
     def search_mentions(self, keywords: List[str], hours_back: int = 24, 
-                       max_results: int = 100) -> List[Dict[str, Any]]:
+                       max_results: int = 100) -> List[Mention]:
         """
         Search for mentions of keywords on Bluesky.
         
@@ -43,80 +117,140 @@ class BlueskyMonitor:
             max_results: Maximum number of posts to retrieve
             
         Returns:
-            List of mention dictionaries with metadata
+            List of mentions with metadata
+        """
+        return self.prepare(keywords)(hours_back, max_results)
+
+    def prepare(self, keywords: List[str]) -> Callable[[int, int], List[Mention]]:
+        """
+        Build a search function specialized for a fixed keyword set.
+        
+        The server query and keyword regex only depend on the keywords, so
+        callers that search repeatedly with the same list can build them once.
+        
+        Args:
+            keywords: List of keywords to search for
+            
+        Returns:
+            Function taking (hours_back, max_results) and returning mentions
         """
+        matcher = get_keyword_matcher(tuple(keywords))
+        
+        # One server-side query for all keywords instead of a round-trip each
+        query = ' OR '.join(f'"{keyword}"' for keyword in matcher.keywords)
+        
+        return functools.partial(self._run_search, matcher, query)
+
+    def _run_search(self, matcher: KeywordMatcher, query: str,
+                    hours_back: int = 24, max_results: int = 100) -> List[Mention]:
+        """Run a search using the state precomputed by prepare()."""
         mentions = []
+        if not matcher.keywords:
+            return mentions
         
-        # Calculate time range
-        cutoff_time = datetime.now() - timedelta(hours=hours_back)
+        seen_ids = set()
         
-        for keyword in keywords:
-            logger.info(f"Searching Bluesky for keyword: {keyword}")
-            try:
-                # Search for posts containing the keyword
-                # Note: AT Protocol search capabilities may be limited
-                # This is a basic implementation that can be enhanced as the API evolves
-                search_results = self._search_posts(keyword, max_results)
-                
-                for post_data in search_results:
-                    # Check if post is within our time range
-                    post_time = self._parse_timestamp(post_data.get('createdAt', ''))
-                    if post_time and post_time < cutoff_time:
-                        continue
-                    
-                    # Verify keyword match (case-insensitive)
-                    content = post_data.get('text', '').lower()
-                    if keyword.lower() in content:
-                        mention = self._extract_post_data(post_data, keyword)
-                        mentions.append(mention)
-                        logger.info(f"Found mention: {post_data.get('text', '')[:50]}...")
-                        
-            except Exception as e:
-                logger.error(f"Error searching for keyword '{keyword}': {e}")
+        # Calculate time range once; the server applies it via the `since` param
+        cutoff_iso = (datetime.now(timezone.utc) - timedelta(hours=hours_back)).isoformat()
+        
+        logger.info("Searching Bluesky with query: %s", query)
+        search_results = self._search_posts(query, max_results, cutoff_iso)
+        
+        for post_data in search_results:
+            # Verify keyword match (case-insensitive) and record which one hit
+            keyword = matcher.find(post_data.get('text', ''))
+            if not keyword:
                 continue
+            
+            # Pages can overlap; skip repeats before paying for extraction
+            post_id = post_data.get('cid') or post_data.get('uri')
+            if not post_id or post_id in seen_ids:
+                continue
+            seen_ids.add(post_id)
+            
+            mention = self._extract_post_data(post_data, keyword, self.include_raw)
+            mentions.append(mention)
+            logger.debug("Found mention: %.50s...", post_data.get('text', ''))
+        
+        mentions = mentions[:max_results]
         
-        # Remove duplicates and limit results
-        unique_mentions = self._deduplicate_mentions(mentions)
-        return unique_mentions[:max_results]
+        self._score_sentiment(mentions)
+        
+        return mentions
 
-    def _search_posts(self, keyword: str, limit: int) -> List[Dict[str, Any]]:
+    def _search_posts(self, query: str, limit: int,
+                      since: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        Search for posts containing a keyword.
-        Note: This implementation may need to be updated based on available AT Protocol search capabilities.
+        Search for posts matching a query via app.bsky.feed.searchPosts.
+        
+        Pages through results with the returned cursor until `limit` posts
+        have been collected or the server has no more results.
+        
+        Args:
+            query: Search query
+            limit: Maximum number of posts to return
+            since: ISO timestamp; only posts after it are returned
         """
+        posts = []
+        cursor = None
+        
         try:
-            # For now, we'll use a basic approach since Bluesky's search API may be evolving
-            # This might need to be updated to use proper search endpoints when available
-            
-            # Try to get recent posts from the firehose or timeline
-            # This is a placeholder implementation that should be enhanced
-            posts = []
-            
-            # You could implement timeline scanning or use search APIs when available
-            # For demonstration, we'll return an empty list for now
-            # In a real implementation, you'd call the appropriate AT Protocol endpoints
-            
-            return posts
-            
+            while len(posts) < limit:
+                params = {
+                    'q': query,
+                    'limit': min(100, limit - len(posts)),  # API limit per request
+                    'sort': 'latest'
+                }
+                if since:
+                    params['since'] = since
+                if cursor:
+                    params['cursor'] = cursor
+                
+                fetched = self.client.app.bsky.feed.search_posts(params=params)
+                
+                for post in fetched.posts:
+                    posts.append(self._post_view_to_dict(post))
+                
+                cursor = fetched.cursor
+                if not cursor or not fetched.posts:
+                    break
+                    
         except Exception as e:
-            logger.error(f"Error in _search_posts for '{keyword}': {e}")
-            return []
+            logger.error(f"Error in _search_posts for '{query}': {e}")
+        
+        return posts[:limit]
 
-    def _parse_timestamp(self, timestamp_str: str) -> Optional[datetime]:
-        """Parse ISO timestamp string to datetime object."""
-        try:
-            if timestamp_str:
-                # Handle ISO format with timezone
-                return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-        except Exception as e:
-            logger.warning(f"Failed to parse timestamp '{timestamp_str}': {e}")
-        return None
+    def _post_view_to_dict(self, post) -> Dict[str, Any]:
+        """
+        Flatten a PostView model into the dict shape used by _extract_post_data.
+        
+        Only the fields we use are read; dumping the whole model would also
+        convert embeds, labels and viewer state that are thrown away.
+        """
+        author = post.author
+        record = post.record  # Text and creation time live on the post record
+        
+        return {
+            'uri': post.uri,
+            'cid': post.cid,
+            'text': getattr(record, 'text', '') or '',
+            'createdAt': getattr(record, 'created_at', '') or '',
+            'author': {
+                'did': author.did,
+                'handle': author.handle,
+                'displayName': author.display_name or author.handle,
+                'avatar': author.avatar or ''
+            },
+            'likeCount': post.like_count or 0,
+            'repostCount': post.repost_count or 0,
+            'replyCount': post.reply_count or 0,
+            'indexedAt': post.indexed_at
+        }
 
-    def _extract_post_data(self, post_data: Dict[str, Any], keyword: str) -> Dict[str, Any]:
-        """Extract relevant data from a Bluesky post."""
-        # Analyze sentiment
+    def _extract_post_data(self, post_data: Dict[str, Any], keyword: str,
+                           include_raw: bool = False) -> Mention:
+        """Extract relevant data from a Bluesky post (sentiment is scored later)."""
         text = post_data.get('text', '')
-        sentiment = self._analyze_sentiment(text)
         
         # Extract author information
         author = post_data.get('author', {})
@@ -132,22 +266,10 @@ class BlueskyMonitor:
         post_uri = post_data.get('uri', '')
         post_url = self._generate_post_url(author_handle, post_uri)
         
-        return {
-            'platform': 'bluesky',
-            'type': 'post',
-            'id': post_data.get('cid', '') or post_data.get('uri', ''),
-            'title': f"Post by @{author_handle}",
-            'content': text,
-            'author': author_handle,
-            'author_display_name': author_display_name,
-            'url': post_url,
-            'score': like_count + repost_count,  # Combined engagement score
-            'num_comments': reply_count,
-            'created_utc': post_data.get('createdAt', ''),
-            'keyword_matched': keyword,
-            'sentiment_score': sentiment['polarity'],
-            'sentiment_label': sentiment['label'],
-            'raw_data': {
+        # Raw fields mostly duplicate the top-level ones; only keep on request
+        raw_data = {}
+        if include_raw:
+            raw_data = {
                 'like_count': like_count,
                 'repost_count': repost_count,
                 'reply_count': reply_count,
@@ -157,75 +279,53 @@ class BlueskyMonitor:
                 'author_avatar': author.get('avatar', ''),
                 'indexed_at': post_data.get('indexedAt', '')
             }
-        }
+        
+        return Mention(
+            platform='bluesky',
+            type='post',
+            id=post_data.get('cid', '') or post_data.get('uri', ''),
+            title=f"Post by @{author_handle}",
+            content=text,
+            author=author_handle,
+            author_display_name=author_display_name,
+            url=post_url,
+            score=like_count + repost_count,  # Combined engagement score
+            num_comments=reply_count,
+            created_utc=_parse_timestamp(post_data.get('createdAt', '')),
+            keyword_matched=keyword,
+            sentiment_score=0.0,
+            sentiment_label='neutral',
+            raw_data=raw_data
+        )
 
     def _generate_post_url(self, author_handle: str, post_uri: str) -> str:
         """Generate a Bluesky post URL from handle and URI."""
-        try:
-            # Extract the post ID from the URI
-            # URI format: at://did:plc:...../app.bsky.feed.post/....
-            if 'app.bsky.feed.post/' in post_uri:
-                post_id = post_uri.split('app.bsky.feed.post/')[-1]
-                return f"https://bsky.app/profile/{author_handle}/post/{post_id}"
-        except Exception:
-            pass
+        # URI format: at://did:plc:...../app.bsky.feed.post/....
+        _, sep, post_id = post_uri.rpartition('app.bsky.feed.post/')
+        if sep:
+            return f"https://bsky.app/profile/{author_handle}/post/{post_id}"
         
         # Fallback to profile URL if we can't construct the post URL
         return f"https://bsky.app/profile/{author_handle}"
 
-    def _analyze_sentiment(self, text: str) -> Dict[str, Any]:
-        """Analyze sentiment of text using TextBlob."""
-        if not text or text.isspace():
-            return {'polarity': 0.0, 'label': 'neutral'}
-            
-        # Clean text for sentiment analysis
-        clean_text = self._clean_text_for_sentiment(text)
-        
-        blob = TextBlob(clean_text)
-        polarity = blob.sentiment.polarity
-        
-        # Convert polarity to label
-        if polarity > 0.1:
-            label = 'positive'
-        elif polarity < -0.1:
-            label = 'negative'
-        else:
-            label = 'neutral'
-            
-        return {
-            'polarity': polarity,
-            'subjectivity': blob.sentiment.subjectivity,
-            'label': label
-        }
+    def _score_sentiment(self, mentions: List[Mention]) -> None:
+        """Score post text without URLs and handles (VADER's recommended ±0.05 labels)."""
+        score_mentions(mentions, [self._clean_text_for_sentiment(m.content) for m in mentions],
+                       threshold=0.05)
 
     def _clean_text_for_sentiment(self, text: str) -> str:
         """Clean post text for better sentiment analysis."""
         # Remove URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+        text = _URL_RE.sub('', text)
         
         # Remove mentions for sentiment (but keep the text)
-        text = re.sub(r'@[\w.-]+', '', text)
+        text = _MENTION_RE.sub('', text)
         
         # Remove hashtags for sentiment (but keep the text)
-        text = re.sub(r'#(\w+)', r'\1', text)
+        text = _HASHTAG_RE.sub(r'\1', text)
         
         # Clean up extra whitespace
-        text = ' '.join(text.split())
-        
-        return text.strip()
-
-    def _deduplicate_mentions(self, mentions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate mentions based on post ID."""
-        seen_ids = set()
-        unique_mentions = []
-        
-        for mention in mentions:
-            post_id = mention.get('id', '')
-            if post_id and post_id not in seen_ids:
-                seen_ids.add(post_id)
-                unique_mentions.append(mention)
-        
-        return unique_mentions
+        return _WS_RE.sub(' ', text).strip()
 
     def get_user_profile(self, handle: str) -> Optional[Dict[str, Any]]:
         """Get user profile information."""
@@ -255,8 +355,8 @@ def main():
         
         print(f"Found {len(mentions)} mentions:")
         for mention in mentions[:5]:  # Show first 5
-            print(f"- @{mention['author']}: {mention['content'][:60]}... "
-                  f"(Engagement: {mention['score']}, Sentiment: {mention['sentiment_label']})")
+            print(f"- @{mention.author}: {mention.content[:60]}... "
+                  f"(Engagement: {mention.score}, Sentiment: {mention.sentiment_label})")
                   
     except Exception as e:
         print(f"Error testing Bluesky monitor: {e}")
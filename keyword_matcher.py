@@ -0,0 +1,46 @@
+"""
+Keyword Matching for Mention Monitoring
+Finds which tracked keyword occurs in a piece of text with a single regex scan.
+"""
+
+import functools
+import re
+from typing import Optional, Sequence, Tuple
+
+
+class KeywordMatcher:
+    def __init__(self, keywords: Sequence[str]):
+        """
+        Compile keywords into one case-insensitive alternation.
+
+        Each keyword gets a named group (k0, k1, ...) so a match maps
+        straight back to the configured keyword rather than the text's casing.
+        Longer keywords are tried first, so "ansible automation platform"
+        wins over "ansible" when both match at the same position.
+
+        Args:
+            keywords: Keywords to look for
+        """
+        self.keywords = tuple(keywords)
+        longest_first = sorted(range(len(self.keywords)), key=lambda i: len(self.keywords[i]),
+                               reverse=True)
+        self.pattern = re.compile(
+            '|'.join(f'(?P<k{i}>{re.escape(self.keywords[i])})' for i in longest_first),
+            re.IGNORECASE
+        )
+
+    def find(self, text: str) -> Optional[str]:
+        """Return the keyword found in text, or None if there is none."""
+        if not text or not self.keywords:
+            return None
+
+        match = self.pattern.search(text)
+        if not match:
+            return None
+        return self.keywords[int(match.lastgroup[1:])]
+
+
+@functools.lru_cache(maxsize=16)
+def get_keyword_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """Return a shared matcher for a keyword tuple, compiling it only once."""
+    return KeywordMatcher(keywords)
@@ -5,17 +5,18 @@ Main script that coordinates Reddit and Twitter monitoring for Ansible mentions.
 """
 
 import os
-import json
-import pandas as pd
+import csv
+import io
+import operator
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any
 from dotenv import load_dotenv
 import logging
 import argparse
 
-from reddit_monitor import RedditMonitor
-from twitter_monitor import TwitterMonitor
-from bluesky_monitor import BlueskyMonitor
+from models import Mention
 
 # Configure logging
 logging.basicConfig(
@@ -28,11 +29,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+PLATFORM_EMOJI = {"reddit": "🔴", "twitter": "🐦", "bluesky": "☁️"}
+
+# int8 codes for sentiment labels; anything else counts as neutral (0)
+SENTIMENT_CODES = {'positive': 1, 'negative': -1}
+
 
 class MentionBot:
-    def __init__(self, config_file: str = '.env'):
-        """Initialize the mention monitoring bot."""
+    def __init__(self, config_file: str = '.env', verbose: bool = False):
+        """
+        Initialize the mention monitoring bot.
+        
+        Args:
+            config_file: Path to the .env configuration file
+            verbose: Keep per-platform raw_data in saved JSON output
+        """
         load_dotenv(config_file)
+        self.verbose = verbose
         
         # Load configuration
         self.product_name = os.getenv('PRODUCT_NAME', 'Ansible')
@@ -44,6 +57,7 @@ class MentionBot:
         self.reddit_monitor = None
         self.twitter_monitor = None
         self.bluesky_monitor = None
+        self._bsky_run = None
         
         self._setup_reddit_monitor()
         self._setup_twitter_monitor()
@@ -61,6 +75,9 @@ class MentionBot:
         
         if reddit_client_id and reddit_client_secret and reddit_user_agent:
             try:
+                # Imported here so runs without Reddit credentials skip praw
+                from reddit_monitor import RedditMonitor
+                
                 self.reddit_monitor = RedditMonitor(
                     client_id=reddit_client_id,
                     client_secret=reddit_client_secret,
@@ -82,6 +99,9 @@ class MentionBot:
         
         if twitter_bearer_token:
             try:
+                # Imported here so runs without Twitter credentials skip tweepy
+                from twitter_monitor import TwitterMonitor
+                
                 self.twitter_monitor = TwitterMonitor(
                     bearer_token=twitter_bearer_token,
                     api_key=twitter_api_key,
@@ -102,119 +122,149 @@ class MentionBot:
         
         if bluesky_username and bluesky_password:
             try:
+                # Imported here so runs without Bluesky credentials skip atproto
+                from bluesky_monitor import BlueskyMonitor
+                
                 self.bluesky_monitor = BlueskyMonitor(
                     username=bluesky_username,
-                    password=bluesky_password
+                    password=bluesky_password,
+                    include_raw=self.verbose
                 )
+                # Keywords are fixed for the bot's lifetime; specialize once
+                self._bsky_run = self.bluesky_monitor.prepare(self.keywords)
                 logger.info("Bluesky monitor initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize Bluesky monitor: {e}")
         else:
             logger.warning("Bluesky credentials not found - Bluesky monitoring disabled")
 
-    def collect_mentions(self, hours_back: int = None) -> List[Dict[str, Any]]:
+    def collect_mentions(self, hours_back: int = None) -> List[Mention]:
         """Collect mentions from all available platforms."""
         if hours_back is None:
             hours_back = self.check_interval_hours
             
         all_mentions = []
         
-        # Collect Reddit mentions
-        if self.reddit_monitor:
-            logger.info("Collecting Reddit mentions...")
-            try:
-                reddit_mentions = self.reddit_monitor.search_mentions(
+        # Each monitor is dominated by network latency, so query the
+        # platforms concurrently and collect results in a fixed order.
+        futures = {}
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            if self.reddit_monitor:
+                logger.info("Collecting Reddit mentions...")
+                futures['Reddit'] = executor.submit(
+                    self.reddit_monitor.search_mentions,
                     keywords=self.keywords,
                     subreddits=self.subreddits,
                     hours_back=hours_back
                 )
-                all_mentions.extend(reddit_mentions)
-                logger.info(f"Found {len(reddit_mentions)} Reddit mentions")
-            except Exception as e:
-                logger.error(f"Error collecting Reddit mentions: {e}")
-        
-        # Collect Twitter mentions
-        if self.twitter_monitor:
-            logger.info("Collecting Twitter mentions...")
-            try:
-                twitter_mentions = self.twitter_monitor.search_mentions(
+            
+            if self.twitter_monitor:
+                logger.info("Collecting Twitter mentions...")
+                futures['Twitter'] = executor.submit(
+                    self.twitter_monitor.search_mentions,
                     keywords=self.keywords,
                     hours_back=hours_back,
                     max_results=100
                 )
-                all_mentions.extend(twitter_mentions)
-                logger.info(f"Found {len(twitter_mentions)} Twitter mentions")
-            except Exception as e:
-                logger.error(f"Error collecting Twitter mentions: {e}")
+            
+            if self.bluesky_monitor:
+                logger.info("Collecting Bluesky mentions...")
+                futures['Bluesky'] = executor.submit(self._bsky_run, hours_back, 100)
         
-        # Collect Bluesky mentions
-        if self.bluesky_monitor:
-            logger.info("Collecting Bluesky mentions...")
+        for platform, future in futures.items():
             try:
-                bluesky_mentions = self.bluesky_monitor.search_mentions(
-                    keywords=self.keywords,
-                    hours_back=hours_back,
-                    max_results=100
-                )
-                all_mentions.extend(bluesky_mentions)
-                logger.info(f"Found {len(bluesky_mentions)} Bluesky mentions")
+                platform_mentions = future.result()
+                all_mentions.extend(platform_mentions)
+                logger.info("Found %d %s mentions", len(platform_mentions), platform)
             except Exception as e:
-                logger.error(f"Error collecting Bluesky mentions: {e}")
+                logger.error(f"Error collecting {platform} mentions: {e}")
         
-        logger.info(f"Total mentions collected: {len(all_mentions)}")
+        logger.info("Total mentions collected: %d", len(all_mentions))
         return all_mentions
 
-    def analyze_sentiment_summary(self, mentions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def analyze_sentiment_summary(self, mentions: List[Mention]) -> Dict[str, Any]:
         """Analyze overall sentiment distribution."""
         if not mentions:
             return {'total': 0, 'positive': 0, 'negative': 0, 'neutral': 0}
         
-        sentiment_counts = {'positive': 0, 'negative': 0, 'neutral': 0}
-        total_score = 0
+        import numpy as np
         
-        for mention in mentions:
-            sentiment_label = mention.get('sentiment_label', 'neutral')
-            sentiment_counts[sentiment_label] += 1
-            total_score += mention.get('sentiment_score', 0)
+        # Encode labels as int8 and scores as float so the counts and mean
+        # are single vectorized reductions
+        total = len(mentions)
+        labels = np.fromiter((SENTIMENT_CODES.get(m.sentiment_label, 0) for m in mentions),
+                             dtype=np.int8, count=total)
+        scores = np.fromiter((m.sentiment_score for m in mentions),
+                             dtype=np.float64, count=total)
+        positive = int(np.count_nonzero(labels == 1))
+        negative = int(np.count_nonzero(labels == -1))
         
         return {
-            'total': len(mentions),
-            'positive': sentiment_counts['positive'],
-            'negative': sentiment_counts['negative'],
-            'neutral': sentiment_counts['neutral'],
-            'average_sentiment': total_score / len(mentions) if mentions else 0,
-            'positive_percentage': (sentiment_counts['positive'] / len(mentions)) * 100,
-            'negative_percentage': (sentiment_counts['negative'] / len(mentions)) * 100
+            'total': total,
+            'positive': positive,
+            'negative': negative,
+            'neutral': total - positive - negative,
+            'average_sentiment': float(scores.mean()),
+            'positive_percentage': (positive / total) * 100,
+            'negative_percentage': (negative / total) * 100
         }
 
-    def get_top_mentions(self, mentions: List[Dict[str, Any]], limit: int = 10) -> List[Dict[str, Any]]:
+    def get_top_mentions(self, mentions: List[Mention], limit: int = 10) -> List[Mention]:
         """Get top mentions sorted by engagement/score."""
-        return sorted(mentions, key=lambda x: x.get('score', 0), reverse=True)[:limit]
+        if not mentions or limit <= 0:
+            return []
+        
+        import numpy as np
+        
+        scores = np.fromiter((m.score or 0 for m in mentions),
+                             dtype=np.float64, count=len(mentions))
+        
+        # Select the top `limit` in O(n), then order just that slice. Ties at
+        # the cut-off are taken in input order to match a stable sort.
+        if len(mentions) > limit:
+            kth = np.partition(scores, -limit)[-limit]
+            above = np.flatnonzero(scores > kth)
+            ties = np.flatnonzero(scores == kth)[:limit - len(above)]
+            top = np.concatenate((above, ties))
+        else:
+            top = np.arange(len(mentions))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        
+        return [mentions[i] for i in top]
 
-    def save_mentions(self, mentions: List[Dict[str, Any]], filename: str = None) -> str:
+    def save_mentions(self, mentions: List[Mention], filename: str = None) -> str:
         """Save mentions to a file."""
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"mentions_{timestamp}.json"
         
-        # Save as JSON
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(mentions, f, indent=2, ensure_ascii=False, default=str)
+        # Save as JSON; the payload is fully encoded first and written in one call
+        payload = orjson.dumps([m.to_dict(include_raw=self.verbose) for m in mentions], default=str,
+                               option=orjson.OPT_INDENT_2)
+        with open(filename, 'wb') as f:
+            f.write(payload)
         
         # Also save as CSV for easy viewing
         csv_filename = filename.replace('.json', '.csv')
         if mentions:
-            df = pd.DataFrame(mentions)
             # Select key columns for CSV
             key_columns = ['platform', 'type', 'title', 'author', 'sentiment_label', 
                           'sentiment_score', 'score', 'created_utc', 'url']
-            available_columns = [col for col in key_columns if col in df.columns]
-            df[available_columns].to_csv(csv_filename, index=False)
+            # Timestamps are kept as epoch seconds and only formatted here
+            row_of = operator.attrgetter(*('created_iso' if col == 'created_utc' else col
+                                           for col in key_columns))
+            # Render in memory so the file gets a single write instead of one per row
+            buffer = io.StringIO(newline='')
+            writer = csv.writer(buffer)
+            writer.writerow(key_columns)
+            writer.writerows(row_of(m) for m in mentions)
+            with open(csv_filename, 'w', encoding='utf-8', newline='') as f:
+                f.write(buffer.getvalue())
         
         logger.info(f"Mentions saved to {filename} and {csv_filename}")
         return filename
 
-    def generate_report(self, mentions: List[Dict[str, Any]]) -> str:
+    def generate_report(self, mentions: List[Mention]) -> str:
         """Generate a text report of findings."""
         if not mentions:
             return "No mentions found in the specified time period."
@@ -225,10 +275,10 @@ class MentionBot:
         # Platform breakdown
         platform_counts = {}
         for mention in mentions:
-            platform = mention['platform']
+            platform = mention.platform
             platform_counts[platform] = platform_counts.get(platform, 0) + 1
         
-        report = f"""
+        parts = [f"""
 === {self.product_name} Mention Report ===
 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
@@ -243,15 +293,17 @@ Neutral: {sentiment_summary['neutral']} ({100 - sentiment_summary['positive_perc
 Average Sentiment Score: {sentiment_summary['average_sentiment']:.3f}
 
 🔥 TOP MENTIONS (by engagement):
-"""
+"""]
         
         for i, mention in enumerate(top_mentions, 1):
-            platform_emoji = {"reddit": "🔴", "twitter": "🐦", "bluesky": "☁️"}.get(mention['platform'], "📱")
-            report += f"\n{i}. {platform_emoji} {mention['title'][:60]}..."
-            report += f"\n   Author: {mention['author']} | Score: {mention['score']} | Sentiment: {mention['sentiment_label']}"
-            report += f"\n   URL: {mention['url']}\n"
+            platform_emoji = PLATFORM_EMOJI.get(mention.platform, "📱")
+            parts.append(
+                f"\n{i}. {platform_emoji} {mention.title[:60]}..."
+                f"\n   Author: {mention.author} | Score: {mention.score} | Sentiment: {mention.sentiment_label}"
+                f"\n   URL: {mention.url}\n"
+            )
         
-        return report
+        return ''.join(parts)
 
     def run_check(self, hours_back: int = None, save_results: bool = True) -> Dict[str, Any]:
         """Run a complete mention check."""
@@ -286,11 +338,13 @@ def main():
                        help='Don\'t save results to file')
     parser.add_argument('--config', type=str, default='.env',
                        help='Configuration file path')
+    parser.add_argument('--verbose', action='store_true',
+                       help='Include raw platform data in the saved JSON')
     
     args = parser.parse_args()
     
     try:
-        bot = MentionBot(config_file=args.config)
+        bot = MentionBot(config_file=args.config, verbose=args.verbose)
         results = bot.run_check(
             hours_back=args.hours,
             save_results=not args.no_save
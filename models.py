@@ -0,0 +1,44 @@
+"""
+Data Models for Mention Monitoring
+Record types shared by the platform monitors and the main bot.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+
+@dataclass(slots=True)
+class Mention:
+    """A post, comment or tweet that matched one of the tracked keywords."""
+    platform: str
+    type: str
+    id: str
+    title: str
+    content: str
+    author: str
+    url: str
+    score: int  # Platform-specific engagement score
+    num_comments: int
+    created_utc: Optional[float]  # Epoch seconds; formatted only on export
+    keyword_matched: str
+    sentiment_score: float
+    sentiment_label: str
+    author_display_name: Optional[str] = None
+    subreddit: Optional[str] = None
+    raw_data: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def created_iso(self) -> Optional[str]:
+        """Creation time as a UTC ISO 8601 string, or None if unknown."""
+        if self.created_utc is None:
+            return None
+        return datetime.fromtimestamp(self.created_utc, timezone.utc).isoformat()
+
+    def to_dict(self, include_raw: bool = True) -> Dict[str, Any]:
+        """Convert to a plain dict for JSON export, optionally without raw_data."""
+        data = {name: getattr(self, name) for name in self.__slots__
+                if include_raw or name != 'raw_data'}
+        data['created_utc'] = self.created_iso
+        return data
+
@@ -5,31 +5,68 @@ Searches specified subreddits for mentions of Ansible and related keywords.
 
 import praw
 import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from itertools import islice
 from typing import List, Dict, Any
-from textblob import TextBlob
 import logging
 
+from keyword_matcher import get_keyword_matcher
+from models import Mention
+from sentiment import score_mentions
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Most comments a single subreddit scan will look at
+COMMENT_BUDGET = 200
+
+# Reddit search time windows, narrowest first, with their length in hours
+_TIME_FILTERS = (('hour', 1), ('day', 24), ('week', 24 * 7),
+                 ('month', 24 * 31), ('year', 24 * 366))
+
+
+def _time_filter_for(hours_back: float) -> str:
+    """Return the narrowest Reddit search time_filter covering hours_back."""
+    for name, hours in _TIME_FILTERS:
+        if hours_back <= hours:
+            return name
+    return 'all'
+
 
 class RedditMonitor:
     def __init__(self, client_id: str, client_secret: str, user_agent: str):
         """Initialize Reddit API connection."""
+        self._credentials = {
+            'client_id': client_id,
+            'client_secret': client_secret,
+            'user_agent': user_agent
+        }
+        # praw.Reddit is not thread-safe (token refresh and rate-limit state
+        # are unlocked), so each concurrent subreddit scan borrows its own
+        self._idle_clients: "queue.SimpleQueue[praw.Reddit]" = queue.SimpleQueue()
+        
         try:
-            self.reddit = praw.Reddit(
-                client_id=client_id,
-                client_secret=client_secret,
-                user_agent=user_agent
-            )
+            self.reddit = self._create_reddit()
+            # The first scan reuses the main client instead of authorizing another
+            self._idle_clients.put(self.reddit)
             logger.info("Reddit API connection established")
         except Exception as e:
             logger.error(f"Failed to connect to Reddit API: {e}")
             raise
 
+    def _create_reddit(self) -> praw.Reddit:
+        """Create a Reddit client with its own HTTP session and rate limiter."""
+        return praw.Reddit(
+            **self._credentials,
+            # praw 8 does not forward its own timeout setting to prawcore
+            requestor_kwargs={'timeout': 30},
+            check_for_async=False
+        )
+
     def search_mentions(self, keywords: List[str], subreddits: List[str], 
-                       hours_back: int = 24, limit: int = 100) -> List[Dict[str, Any]]:
+                       hours_back: int = 24, limit: int = 100) -> List[Mention]:
         """
         Search for mentions across specified subreddits.
         
@@ -40,137 +77,151 @@ class RedditMonitor:
             limit: Maximum number of posts to check per subreddit
             
         Returns:
-            List of mention dictionaries with metadata
+            List of mentions with metadata
         """
         mentions = []
-        cutoff_time = datetime.now() - timedelta(hours=hours_back)
+        if not subreddits or not keywords:
+            return mentions
+        
+        # Compare raw epoch seconds rather than building a datetime per item
+        cutoff_ts = (datetime.now() - timedelta(hours=hours_back)).timestamp()
+        time_filter = _time_filter_for(hours_back)
+        
+        # Most of a scan is spent waiting on Reddit, so overlap the subreddits.
+        # Results are collected in subreddit order to keep output stable.
+        with ThreadPoolExecutor(max_workers=min(8, len(subreddits))) as executor:
+            futures = [
+                executor.submit(self._scan_subreddit, subreddit_name, keywords,
+                                time_filter, cutoff_ts, limit)
+                for subreddit_name in subreddits
+            ]
+        
+        for future in futures:
+            mentions.extend(future.result())
+        
+        self._score_sentiment(mentions)
+        
+        return mentions
+
+    def _scan_subreddit(self, subreddit_name: str, keywords: List[str], time_filter: str,
+                        cutoff_ts: float, limit: int) -> List[Mention]:
+        """Search one subreddit's recent posts and hot-post comments for keywords."""
+        mentions = []
+        matcher = get_keyword_matcher(tuple(keywords))
         
-        for subreddit_name in subreddits:
-            logger.info(f"Searching r/{subreddit_name}")
+        # Let Reddit's search index do the keyword filtering for posts
+        query = ' OR '.join(f'"{keyword}"' for keyword in matcher.keywords)
+        
+        logger.info("Searching r/%s", subreddit_name)
+        reddit = None
+        try:
+            # Reuse a client left by an earlier scan; never share one between threads
             try:
-                subreddit = self.reddit.subreddit(subreddit_name)
+                reddit = self._idle_clients.get_nowait()
+            except queue.Empty:
+                reddit = self._create_reddit()
+            
+            subreddit = reddit.subreddit(subreddit_name)
+            
+            # Search recent posts
+            for post in subreddit.search(query, sort='new', time_filter=time_filter, limit=limit):
+                # time_filter is coarse; skip posts older than our cutoff
+                if post.created_utc < cutoff_ts:
+                    continue
                 
-                # Search recent posts
-                for post in subreddit.new(limit=limit):
-                    post_time = datetime.fromtimestamp(post.created_utc)
-                    
-                    # Skip posts older than our cutoff
-                    if post_time < cutoff_time:
-                        continue
-                    
-                    # Check if any keyword appears in title or text
-                    content = f"{post.title} {post.selftext}".lower()
+                # Search is stemmed and fuzzy, so confirm an actual keyword hit;
+                # titles usually carry it, so the body is only scanned on a miss
+                keyword = matcher.find(post.title) or matcher.find(post.selftext)
+                if keyword:
+                    mention = self._extract_mention_data(post, keyword)
+                    mentions.append(mention)
+                    logger.debug("Found mention in r/%s: %.50s...", subreddit_name, post.title)
+            
+            # Also check comments in recent posts, up to a fixed budget per scan
+            comments_checked = 0
+            for post in subreddit.hot(limit=50):  # Check fewer posts for comments
+                if comments_checked >= COMMENT_BUDGET:
+                    break
+                if post.created_utc < cutoff_ts:
+                    continue
                     
-                    for keyword in keywords:
-                        if keyword.lower() in content:
-                            mention = self._extract_mention_data(post, keyword)
-                            mentions.append(mention)
-                            logger.info(f"Found mention in r/{subreddit_name}: {post.title[:50]}...")
-                            break  # Don't duplicate posts for multiple keywords
+                # Drop "load more" stubs without fetching them
+                post.comments.replace_more(limit=0)
                 
-                # Also check comments in recent posts
-                for post in subreddit.hot(limit=50):  # Check fewer posts for comments
-                    post_time = datetime.fromtimestamp(post.created_utc)
-                    if post_time < cutoff_time:
+                for comment in islice(post.comments.list(), 20):  # Limit comments per post
+                    if not isinstance(comment, praw.models.Comment):
+                        continue
+                    comments_checked += 1
+                    if comment.created_utc < cutoff_ts:
                         continue
                         
-                    # Expand comment tree
-                    post.comments.replace_more(limit=5)
-                    
-                    for comment in post.comments.list()[:20]:  # Limit comments per post
-                        if hasattr(comment, 'created_utc'):
-                            comment_time = datetime.fromtimestamp(comment.created_utc)
-                            if comment_time < cutoff_time:
-                                continue
+                    keyword = matcher.find(comment.body)
+                    if keyword:
+                        mention = self._extract_comment_data(comment, post, keyword)
+                        mentions.append(mention)
+                        logger.debug("Found mention in comment: %.50s...", comment.body)
                                 
-                            for keyword in keywords:
-                                if keyword.lower() in comment.body.lower():
-                                    mention = self._extract_comment_data(comment, post, keyword)
-                                    mentions.append(mention)
-                                    logger.info(f"Found mention in comment: {comment.body[:50]}...")
-                                    break
-                                    
-            except Exception as e:
-                logger.error(f"Error searching r/{subreddit_name}: {e}")
-                continue
+        except Exception as e:
+            logger.error(f"Error searching r/{subreddit_name}: {e}")
+        finally:
+            if reddit is not None:
+                self._idle_clients.put(reddit)
         
         return mentions
 
-    def _extract_mention_data(self, post, keyword: str) -> Dict[str, Any]:
-        """Extract relevant data from a Reddit post."""
-        # Simple sentiment analysis
-        text = f"{post.title} {post.selftext}"
-        sentiment = self._analyze_sentiment(text)
-        
-        return {
-            'platform': 'reddit',
-            'type': 'post',
-            'id': post.id,
-            'title': post.title,
-            'content': post.selftext,
-            'author': str(post.author) if post.author else '[deleted]',
-            'subreddit': str(post.subreddit),
-            'url': f"https://reddit.com{post.permalink}",
-            'score': post.score,
-            'num_comments': post.num_comments,
-            'created_utc': datetime.fromtimestamp(post.created_utc).isoformat(),
-            'keyword_matched': keyword,
-            'sentiment_score': sentiment['polarity'],
-            'sentiment_label': sentiment['label'],
-            'raw_data': {
+    def _extract_mention_data(self, post, keyword: str) -> Mention:
+        """Extract relevant data from a Reddit post (sentiment is scored later)."""
+        return Mention(
+            platform='reddit',
+            type='post',
+            id=post.id,
+            title=post.title,
+            content=post.selftext,
+            author=str(post.author) if post.author else '[deleted]',
+            subreddit=str(post.subreddit),
+            url=f"https://reddit.com{post.permalink}",
+            score=post.score,
+            num_comments=post.num_comments,
+            created_utc=post.created_utc,
+            keyword_matched=keyword,
+            sentiment_score=0.0,
+            sentiment_label='neutral',
+            raw_data={
                 'upvote_ratio': post.upvote_ratio,
                 'distinguished': post.distinguished,
                 'stickied': post.stickied
             }
-        }
+        )
 
-    def _extract_comment_data(self, comment, post, keyword: str) -> Dict[str, Any]:
-        """Extract relevant data from a Reddit comment."""
-        sentiment = self._analyze_sentiment(comment.body)
-        
-        return {
-            'platform': 'reddit',
-            'type': 'comment',
-            'id': comment.id,
-            'title': f"Comment on: {post.title}",
-            'content': comment.body,
-            'author': str(comment.author) if comment.author else '[deleted]',
-            'subreddit': str(post.subreddit),
-            'url': f"https://reddit.com{comment.permalink}",
-            'score': comment.score,
-            'num_comments': 0,  # Comments don't have sub-comments in our scope
-            'created_utc': datetime.fromtimestamp(comment.created_utc).isoformat(),
-            'keyword_matched': keyword,
-            'sentiment_score': sentiment['polarity'],
-            'sentiment_label': sentiment['label'],
-            'raw_data': {
+    def _extract_comment_data(self, comment, post, keyword: str) -> Mention:
+        """Extract relevant data from a Reddit comment (sentiment is scored later)."""
+        return Mention(
+            platform='reddit',
+            type='comment',
+            id=comment.id,
+            title=f"Comment on: {post.title}",
+            content=comment.body,
+            author=str(comment.author) if comment.author else '[deleted]',
+            subreddit=str(post.subreddit),
+            url=f"https://reddit.com{comment.permalink}",
+            score=comment.score,
+            num_comments=0,  # Comments don't have sub-comments in our scope
+            created_utc=comment.created_utc,
+            keyword_matched=keyword,
+            sentiment_score=0.0,
+            sentiment_label='neutral',
+            raw_data={
                 'is_submitter': comment.is_submitter,
                 'parent_post_id': post.id,
                 'parent_post_title': post.title
             }
-        }
+        )
 
-    def _analyze_sentiment(self, text: str) -> Dict[str, Any]:
-        """Analyze sentiment of text using TextBlob."""
-        if not text or text.isspace():
-            return {'polarity': 0.0, 'label': 'neutral'}
-            
-        blob = TextBlob(text)
-        polarity = blob.sentiment.polarity
-        
-        # Convert polarity to label
-        if polarity > 0.1:
-            label = 'positive'
-        elif polarity < -0.1:
-            label = 'negative'
-        else:
-            label = 'neutral'
-            
-        return {
-            'polarity': polarity,
-            'subjectivity': blob.sentiment.subjectivity,
-            'label': label
-        }
+    def _score_sentiment(self, mentions: List[Mention]) -> None:
+        """Score posts on title and body together, comments on their body (±0.1 labels)."""
+        texts = [m.content if m.type == 'comment' else f"{m.title} {m.content}"
+                 for m in mentions]
+        score_mentions(mentions, texts)
 
     def get_trending_topics(self, subreddit_name: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get trending topics from a specific subreddit."""
@@ -212,7 +263,7 @@ def main():
     
     print(f"Found {len(mentions)} mentions:")
     for mention in mentions[:5]:  # Show first 5
-        print(f"- {mention['title'][:60]}... (Score: {mention['score']}, Sentiment: {mention['sentiment_label']})")
+        print(f"- {mention.title[:60]}... (Score: {mention.score}, Sentiment: {mention.sentiment_label})")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,89 @@
+"""
+Sentiment Analysis for Mention Monitoring
+Shared polarity scoring for the Reddit, Twitter and Bluesky monitors.
+"""
+
+import functools
+import string
+from typing import List, Sequence
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from models import Mention
+
+# VADER is a lexicon lookup tuned for short social-media text, with no
+# tokenizer or POS-tagging pass
+_VADER = SentimentIntensityAnalyzer()
+_POLARITY_WORDS = frozenset(_VADER.lexicon)
+
+
+@functools.lru_cache(maxsize=16384)
+def _sentiment_cached(text: str) -> float:
+    """Return the VADER compound score (-1..1) for text.
+
+    Scoring is deterministic on its input, so reposts, quoted posts and items
+    returned again by a later search are only analyzed once while their text
+    is unchanged.
+    """
+    return _VADER.polarity_scores(text)['compound']
+
+
+def _has_polarity_words(text: str) -> bool:
+    """Check whether any token could carry VADER sentiment.
+
+    Tokens are stripped the way VADER does it (punctuation is kept when it
+    would leave two or fewer characters, so emoticons survive). Emojis are
+    scored through their text descriptions, so non-ASCII text always goes
+    through the full analyzer.
+    """
+    if not text.isascii():
+        return True
+
+    for word in text.split():
+        stripped = word.strip(string.punctuation)
+        token = word if len(stripped) <= 2 else stripped
+        if token.lower() in _POLARITY_WORDS:
+            return True
+    return False
+
+
+def _polarity(text: str) -> float:
+    """Return the compound score for text, skipping VADER when it can only be 0."""
+    # Empty text, or text that is only links, handles and tags, has nothing to score
+    if not text or not _has_polarity_words(text):
+        return 0.0
+    return _sentiment_cached(text)
+
+
+def _label(polarity: float, threshold: float) -> str:
+    """Convert a compound score to a positive/negative/neutral label."""
+    if polarity > threshold:
+        return 'positive'
+    if polarity < -threshold:
+        return 'negative'
+    return 'neutral'
+
+
+def analyze_sentiment_batch(texts: Sequence[str]) -> List[float]:
+    """Return VADER compound scores (-1..1) for texts, in order."""
+    return [_polarity(text) for text in texts]
+
+
+def score_mentions(mentions: Sequence[Mention], texts: Sequence[str],
+                   threshold: float = 0.1) -> None:
+    """
+    Fill in sentiment for collected mentions in one batch.
+
+    Monitors call this once after a search has gathered its matches, so
+    extraction stays free of scoring work and the whole result set is
+    scored together.
+
+    Args:
+        mentions: Mentions to update in place
+        texts: Text to score for each mention, in the same order
+        threshold: Compound score beyond which text counts as positive/negative
+    """
+    polarities = analyze_sentiment_batch(texts)
+    for mention, polarity in zip(mentions, polarities):
+        mention.sentiment_score = polarity
+        mention.sentiment_label = _label(polarity, threshold)
@@ -7,12 +7,24 @@ import tweepy
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
-from textblob import TextBlob
 import logging
+import re
+
+from keyword_matcher import get_keyword_matcher
+from models import Mention
+from sentiment import score_mentions
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# URLs, mentions and hashtags, stripped from tweets before sentiment analysis
+_CLEAN_RE = re.compile(r'http\S+|www\S+|@\w+|#(\w+)')
+
+
+def _clean_match(match: re.Match) -> str:
+    """Replace a _CLEAN_RE match with its hashtag text, or nothing."""
+    return match.group(1) or ''
+
 
 class TwitterMonitor:
     def __init__(self, bearer_token: str, api_key: Optional[str] = None, 
@@ -52,7 +64,7 @@ class TwitterMonitor:
             raise
 
     def search_mentions(self, keywords: List[str], hours_back: int = 24, 
-                       max_results: int = 100) -> List[Dict[str, Any]]:
+                       max_results: int = 100) -> List[Mention]:
         """
         Search for mentions of keywords on Twitter.
         
@@ -62,7 +74,7 @@ class TwitterMonitor:
             max_results: Maximum number of tweets to retrieve
             
         Returns:
-            List of mention dictionaries with metadata
+            List of mentions with metadata
         """
         mentions = []
         
@@ -82,11 +94,11 @@ class TwitterMonitor:
         # Combine with OR operator and exclude retweets
         query = f"({' OR '.join(query_parts)}) -is:retweet lang:en"
         
-        logger.info(f"Searching Twitter with query: {query}")
+        logger.info("Searching Twitter with query: %s", query)
         
         try:
             # Search tweets using Twitter API v2
-            tweets = tweepy.Paginator(
+            paginator = tweepy.Paginator(
                 self.client.search_recent_tweets,
                 query=query,
                 max_results=min(max_results, 100),  # API limit per request
@@ -95,15 +107,20 @@ class TwitterMonitor:
                 tweet_fields=['created_at', 'author_id', 'public_metrics', 'context_annotations', 'lang'],
                 user_fields=['username', 'name', 'verified', 'public_metrics'],
                 expansions=['author_id']
-            ).flatten(limit=max_results)
+            )
             
-            # Process tweets
+            # Walk pages rather than flattening, so each page's expanded
+            # author records are kept for the user lookup map
+            tweet_list = []
             users_map = {}
-            tweet_list = list(tweets)
-            
-            # Create user lookup map if we have user data
-            if hasattr(tweets, 'includes') and 'users' in tweets.includes:
-                users_map = {user.id: user for user in tweets.includes['users']}
+            for page in paginator:
+                if page.data:
+                    tweet_list.extend(page.data)
+                if page.includes and 'users' in page.includes:
+                    users_map.update((user.id, user) for user in page.includes['users'])
+                if len(tweet_list) >= max_results:
+                    break
+            del tweet_list[max_results:]
             
             for tweet in tweet_list:
                 # Find which keyword matched
@@ -111,51 +128,47 @@ class TwitterMonitor:
                 if matched_keyword:
                     mention = self._extract_tweet_data(tweet, matched_keyword, users_map)
                     mentions.append(mention)
-                    logger.info(f"Found mention: {tweet.text[:50]}...")
+                    logger.debug("Found mention: %.50s...", tweet.text)
                     
         except Exception as e:
             logger.error(f"Error searching Twitter: {e}")
+        
+        self._score_sentiment(mentions)
             
         return mentions
 
     def _find_matching_keyword(self, text: str, keywords: List[str]) -> Optional[str]:
         """Find which keyword appears in the tweet text."""
-        text_lower = text.lower()
-        for keyword in keywords:
-            if keyword.lower() in text_lower:
-                return keyword
-        return None
+        # The compiled matcher is cached per keyword set, so this is one scan
+        return get_keyword_matcher(tuple(keywords)).find(text)
 
-    def _extract_tweet_data(self, tweet, keyword: str, users_map: Dict) -> Dict[str, Any]:
-        """Extract relevant data from a tweet."""
+    def _extract_tweet_data(self, tweet, keyword: str, users_map: Dict) -> Mention:
+        """Extract relevant data from a tweet (sentiment is scored later)."""
         # Get user info if available
         user_info = users_map.get(tweet.author_id, {})
         username = getattr(user_info, 'username', f'user_{tweet.author_id}')
         display_name = getattr(user_info, 'name', username)
         verified = getattr(user_info, 'verified', False)
         
-        # Analyze sentiment
-        sentiment = self._analyze_sentiment(tweet.text)
-        
         # Extract metrics
         metrics = tweet.public_metrics or {}
         
-        return {
-            'platform': 'twitter',
-            'type': 'tweet',
-            'id': tweet.id,
-            'title': f"Tweet by @{username}",
-            'content': tweet.text,
-            'author': username,
-            'author_display_name': display_name,
-            'url': f"https://twitter.com/{username}/status/{tweet.id}",
-            'score': metrics.get('like_count', 0) + metrics.get('retweet_count', 0),  # Combined engagement
-            'num_comments': metrics.get('reply_count', 0),
-            'created_utc': tweet.created_at.isoformat() if tweet.created_at else None,
-            'keyword_matched': keyword,
-            'sentiment_score': sentiment['polarity'],
-            'sentiment_label': sentiment['label'],
-            'raw_data': {
+        return Mention(
+            platform='twitter',
+            type='tweet',
+            id=str(tweet.id),
+            title=f"Tweet by @{username}",
+            content=tweet.text,
+            author=username,
+            author_display_name=display_name,
+            url=f"https://twitter.com/{username}/status/{tweet.id}",
+            score=metrics.get('like_count', 0) + metrics.get('retweet_count', 0),  # Combined engagement
+            num_comments=metrics.get('reply_count', 0),
+            created_utc=tweet.created_at.timestamp() if tweet.created_at else None,
+            keyword_matched=keyword,
+            sentiment_score=0.0,
+            sentiment_label='neutral',
+            raw_data={
                 'retweet_count': metrics.get('retweet_count', 0),
                 'like_count': metrics.get('like_count', 0),
                 'reply_count': metrics.get('reply_count', 0),
@@ -164,48 +177,19 @@ class TwitterMonitor:
                 'language': tweet.lang,
                 'context_annotations': getattr(tweet, 'context_annotations', [])
             }
-        }
+        )
 
-    def _analyze_sentiment(self, text: str) -> Dict[str, Any]:
-        """Analyze sentiment of text using TextBlob."""
-        if not text or text.isspace():
-            return {'polarity': 0.0, 'label': 'neutral'}
-            
-        # Clean text for sentiment analysis (remove URLs, mentions)
-        clean_text = self._clean_text_for_sentiment(text)
-        
-        blob = TextBlob(clean_text)
-        polarity = blob.sentiment.polarity
-        
-        # Convert polarity to label
-        if polarity > 0.1:
-            label = 'positive'
-        elif polarity < -0.1:
-            label = 'negative'
-        else:
-            label = 'neutral'
-            
-        return {
-            'polarity': polarity,
-            'subjectivity': blob.sentiment.subjectivity,
-            'label': label
-        }
+    def _score_sentiment(self, mentions: List[Mention]) -> None:
+        """Score tweet text without URLs and mentions (±0.1 labels)."""
+        score_mentions(mentions, [self._clean_text_for_sentiment(m.content) for m in mentions])
 
     def _clean_text_for_sentiment(self, text: str) -> str:
         """Clean tweet text for better sentiment analysis."""
-        import re
-        
-        # Remove URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-        
-        # Remove mentions and hashtags for sentiment (but keep the text)
-        text = re.sub(r'@\w+', '', text)
-        text = re.sub(r'#(\w+)', r'\1', text)  # Keep hashtag text without #
+        # Drop URLs and mentions, keep hashtag text without the # (one pass)
+        text = _CLEAN_RE.sub(_clean_match, text)
         
         # Clean up extra whitespace
-        text = ' '.join(text.split())
-        
-        return text.strip()
+        return ' '.join(text.split())
 
     def get_trending_hashtags(self, woeid: int = 1) -> List[Dict[str, Any]]:
         """
@@ -224,7 +208,7 @@ class TwitterMonitor:
             logger.error(f"Error getting trending hashtags: {e}")
             return []
 
-    def search_user_mentions(self, username: str, hours_back: int = 24) -> List[Dict[str, Any]]:
+    def search_user_mentions(self, username: str, hours_back: int = 24) -> List[Mention]:
         """Search for mentions of a specific user."""
         query = f"@{username} -is:retweet lang:en"
         return self.search_mentions([f"@{username}"], hours_back)
@@ -250,7 +234,7 @@ def main():
     
     print(f"Found {len(mentions)} mentions:")
     for mention in mentions[:5]:  # Show first 5
-        print(f"- @{mention['author']}: {mention['content'][:60]}... (Engagement: {mention['score']}, Sentiment: {mention['sentiment_label']})")
+        print(f"- @{mention.author}: {mention.content[:60]}... (Engagement: {mention.score}, Sentiment: {mention.sentiment_label})")
 
 
 if __name__ == "__main__":